@@ -6,30 +6,46 @@ Read Clipboard Aloud
 - It reads the response aloud using macOS text-to-speech
 """
 
+import re
 import subprocess
 import sys
 
+# Text cleanup patterns (compiled once)
+_CODE_RE = re.compile(r'```.*?```', re.DOTALL)
+_MD_RE = re.compile(r'[#*`_\[\]]')
+_URL_RE = re.compile(r'https?://\S+')
+_NL_RE = re.compile(r'\n+')
+
+try:
+    from AppKit import NSPasteboard
+except ImportError:
+    NSPasteboard = None
+
 def get_clipboard():
-    """Get text from clipboard using pbpaste."""
+    """Get text from clipboard (native pasteboard, pbpaste as fallback)."""
+    if NSPasteboard is not None:
+        pb = NSPasteboard.generalPasteboard()
+        return pb.stringForType_("public.utf8-plain-text") or ""
     result = subprocess.run(["pbpaste"], capture_output=True, text=True)
     return result.stdout
 
 def clean_text(text):
     """Clean text for better speech."""
     # Remove code blocks
-    import re
-    text = re.sub(r'```[\s\S]*?```', ' code block omitted ', text)
+    text = _CODE_RE.sub(' code block omitted ', text)
     # Remove markdown
-    text = re.sub(r'[#*`_\[\]]', '', text)
+    text = _MD_RE.sub('', text)
     # Remove URLs
-    text = re.sub(r'https?://\S+', ' link ', text)
+    text = _URL_RE.sub(' link ', text)
     # Remove multiple newlines
-    text = re.sub(r'\n+', '. ', text)
+    text = _NL_RE.sub('. ', text)
     return text.strip()
 
 def speak(text, rate=180):
-    """Speak text using macOS say command."""
-    subprocess.run(["say", "-r", str(rate), text])
+    """Speak text using macOS say command (text piped via stdin)."""
+    proc = subprocess.Popen(["say", "-r", str(rate)],
+                            stdin=subprocess.PIPE, text=True)
+    proc.communicate(text)
 
 def main():
     print("📋 Reading clipboard content aloud...")
@@ -41,14 +57,9 @@ def main():
         speak("Clipboard is empty")
         return
     
-    # Clean and truncate
+    # Clean (no truncation needed - text goes through stdin, not argv)
     clean = clean_text(text)
     
-    # Limit length (say can handle a lot but let's be reasonable)
-    if len(clean) > 2000:
-        clean = clean[:2000] + "... and more."
-        print("⚠️  Text truncated (too long)")
-    
     print(f"Speaking {len(clean)} characters...")
     print("-" * 40)
     print(clean[:200] + "..." if len(clean) > 200 else clean)
@@ -7,139 +7,394 @@ Voice Assistant Wrapper for Augment CLI (auggie)
 """
 
 import subprocess
-import tempfile
+import shutil
+import json
 import os
 import sys
 import re
-
-# Global whisper model (loaded once)
+import queue
+import threading
+import time
+import warnings
+
+# whisper.cpp backend is used when available (falls back to PyTorch whisper)
+try:
+    from pywhispercpp.model import Model as WhisperCppModel
+except ImportError:
+    WhisperCppModel = None
+
+# Required packages: installed on first run if missing
+try:
+    import numpy as np
+    import sounddevice as sd
+    if WhisperCppModel is None:
+        import torch
+        import whisper
+except ImportError as e:
+    print(f"Missing: {e}")
+    print("Installing...")
+    subprocess.run([sys.executable, "-m", "pip", "install",
+                   "openai-whisper", "sounddevice", "numpy", "-q"])
+    print("Restart after install.")
+    sys.exit(1)
+
+# In-process speech synthesizer when PyObjC is available (falls back to say)
+try:
+    from AppKit import NSSpeechSynthesizer
+except ImportError:
+    NSSpeechSynthesizer = None
+
+# Text cleanup patterns (compiled once)
+_CODE_RE = re.compile(r'```.*?```', re.DOTALL)
+_MD_RE = re.compile(r'[#*`_\[\]]')
+_URL_RE = re.compile(r'https?://\S+')
+_NL_RE = re.compile(r'\n+')
+# A sentence ends at . ! or ? followed by whitespace
+_SENTENCE_END_RE = re.compile(r'[.!?](?=\s)')
+
+# Global whisper model (loaded once) and its background warm-up thread
 WHISPER_MODEL = None
+WARMUP_THREAD = None
 
-def check_dependencies():
-    """Check and install required packages."""
-    try:
-        import whisper
-        import sounddevice
-        import numpy
-        return True
-    except ImportError as e:
-        print(f"Missing: {e}")
-        print("Installing...")
-        subprocess.run([sys.executable, "-m", "pip", "install",
-                       "openai-whisper", "sounddevice", "numpy", "-q"])
-        return False
+# Long-lived speech synthesizer (created on first use)
+SYNTHESIZER = None
+
+# Cached auggie session ID and where auggie keeps its sessions
+SESSION_ID = None
+AUGGIE_SESSIONS_DIR = os.path.expanduser("~/.augment/sessions")
+
+# auggie command; resolved once at startup (direct binary, npx as fallback)
+AUGGIE_CMD = ["npx", "@augmentcode/auggie"]
+
+# Longest recording kept (seconds); audio past this is dropped
+MAX_SECONDS = 120
+
+# Recorded audio is transcribed in windows of this length while recording
+# (must stay <= 30s so a window fits one Whisper mel frame). Each window is
+# cut at the quietest spot in its last CUT_SEARCH_SECONDS, between words.
+WINDOW_SECONDS = 10
+CUT_SEARCH_SECONDS = 2
+
+# Most pending windows decoded together in one Whisper forward pass
+BATCH_SIZE = 4
 
 def load_whisper():
     """Load whisper model once."""
     global WHISPER_MODEL
-    if WHISPER_MODEL is None:
-        import whisper
+    if WHISPER_MODEL is None and WhisperCppModel is not None:
+        print("🔄 Loading speech model (one-time)...")
+        # ggml q8_0 weights with native NEON/AVX/Metal kernels
+        # Quiet: progress/log lines would land on top of the input() prompt
+        WHISPER_MODEL = WhisperCppModel("base.en-q8_0", n_threads=os.cpu_count(),
+                                        print_progress=False,
+                                        redirect_whispercpp_logs_to=None)
+    elif WHISPER_MODEL is None:
         print("🔄 Loading speech model (one-time)...")
-        WHISPER_MODEL = whisper.load_model("base")
+        model = whisper.load_model("base", device="cpu")
+        # int8 dynamic quantization of the Linear layers: faster CPU matmuls
+        _plain_linears(model)
+        # torch.ao.quantization is deprecated upstream but still the only
+        # dynamic int8 path for eager models; keep its warnings off the console
+        with warnings.catch_warnings():
+            warnings.filterwarnings(
+                "ignore", message=r"torch\.ao\.quantization is deprecated",
+                category=DeprecationWarning)
+            warnings.filterwarnings(
+                "ignore", message=r"torch\.quantize_per_tensor",
+                category=UserWarning)
+            WHISPER_MODEL = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
     return WHISPER_MODEL
 
-def record_audio(sample_rate=16000):
-    """Record audio. Press Ctrl+C to stop."""
-    import sounddevice as sd
-    import numpy as np
+def _plain_linears(module):
+    """Swap whisper's Linear subclass for nn.Linear so quantize_dynamic matches it."""
+    for name, child in module.named_children():
+        if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+            plain = torch.nn.Linear(child.in_features, child.out_features,
+                                    bias=child.bias is not None)
+            plain.weight = child.weight
+            plain.bias = child.bias
+            setattr(module, name, plain)
+        else:
+            _plain_linears(child)
+
+def _run_whisper(model, audio, prompt=None):
+    """Run one transcription on float32 16kHz mono audio with either backend."""
+    if WhisperCppModel is not None:
+        # Overrides persist on the model, so always reset the prompt
+        segments = model.transcribe(audio, language="en",
+                                    initial_prompt=prompt or "")
+        return " ".join(seg.text.strip() for seg in segments).strip()
+
+    result = model.transcribe(audio, language="en", fp16=False,
+                              condition_on_previous_text=True,
+                              initial_prompt=prompt)
+    return result["text"].strip()
 
+def warm_whisper():
+    """Run a silent inference in the background to pay first-call setup early."""
+    global WARMUP_THREAD
+    model = load_whisper()
+
+    def warmup():
+        _run_whisper(model, np.zeros(16000, dtype=np.float32))
+
+    WARMUP_THREAD = threading.Thread(target=warmup, daemon=True)
+    WARMUP_THREAD.start()
+
+def _quiet_cut(audio, start, end, sample_rate):
+    """Index in audio[start:end] at the centre of its quietest 20ms frame."""
+    frame = sample_rate // 50
+    n = (end - start) // frame
+    if n == 0:
+        return end
+    seg = audio[start:start + n * frame].reshape(n, frame)
+    energy = np.einsum('ij,ij->i', seg, seg)
+    return start + int(np.argmin(energy)) * frame + frame // 2
+
+def record_audio(sample_rate=16000, windows=None):
+    """Record audio. Press Ctrl+C to stop.
+
+    If a windows queue is given, a slice of up to WINDOW_SECONDS (ending at
+    a quiet point) is put on it whenever that much audio has arrived,
+    followed by the tail and a final None once recording stops.
+    """
     print("\n🎤 RECORDING... (Ctrl+C to stop)")
-    audio_chunks = []
+    # Preallocated buffer, filled in place by the callback
+    buf = np.empty((sample_rate * MAX_SECONDS, 1), dtype=np.float32)
+    pos = [0]
+    queued = [0]
+    flat = buf.ravel()
+    window = sample_rate * WINDOW_SECONDS
+    search = sample_rate * CUT_SEARCH_SECONDS
 
     def callback(indata, frames, time, status):
-        audio_chunks.append(indata.copy())
+        if pos[0] == len(buf):
+            return
+        n = min(len(indata), len(buf) - pos[0])
+        buf[pos[0]:pos[0] + n] = indata[:n]
+        pos[0] += n
+        if pos[0] == len(buf):
+            print(f"\n⚠️  Reached {MAX_SECONDS}s limit, no longer recording (Ctrl+C to stop)")
+        if windows is not None and pos[0] - queued[0] >= window:
+            end = queued[0] + window
+            cut = _quiet_cut(flat, end - search, end, sample_rate)
+            windows.put(flat[queued[0]:cut])
+            queued[0] = cut
 
     try:
-        with sd.InputStream(samplerate=sample_rate, channels=1, callback=callback):
+        with sd.InputStream(samplerate=sample_rate, channels=1,
+                            dtype="float32", callback=callback):
             while True:
                 sd.sleep(100)
     except KeyboardInterrupt:
         pass
 
     print("⏹️  Stopped.")
-    return np.concatenate(audio_chunks, axis=0).flatten() if audio_chunks else None
+    if windows is not None:
+        if pos[0] > queued[0]:
+            windows.put(flat[queued[0]:pos[0]])
+        windows.put(None)
+    return flat[:pos[0]] if pos[0] else None
 
-def transcribe(audio, sample_rate=16000):
+def transcribe(audio, sample_rate=16000, prompt=None):
     """Transcribe audio using Whisper."""
-    import numpy as np
-    import wave
-
     model = load_whisper()
+    if WARMUP_THREAD is not None:
+        WARMUP_THREAD.join()
+
+    # Whisper takes 16kHz mono float32 in [-1, 1] directly - no WAV roundtrip
+    return _run_whisper(model, audio.astype(np.float32, copy=False), prompt)
+
+def transcribe_batch(audios, sample_rate=16000, prompt=None):
+    """Transcribe several clips (each <= 30s), sharing one forward pass."""
+    if WhisperCppModel is not None or len(audios) == 1:
+        texts = []
+        for audio in audios:
+            text = transcribe(audio, sample_rate, prompt)
+            texts.append(text)
+            prompt = text or prompt
+        return texts
 
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-        temp_path = f.name
-        with wave.open(temp_path, 'wb') as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(sample_rate)
-            wf.writeframes((audio * 32767).astype(np.int16).tobytes())
-
-    result = model.transcribe(temp_path, language="en")
-    os.unlink(temp_path)
-    return result["text"].strip()
+    model = load_whisper()
+    if WARMUP_THREAD is not None:
+        WARMUP_THREAD.join()
+
+    # One (B, n_mels, 3000) batch through the encoder, decoded together.
+    # Prompts can't be chained inside one pass, so all clips share `prompt`.
+    mel = torch.stack([
+        whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(audio.astype(np.float32, copy=False)),
+            model.dims.n_mels)
+        for audio in audios
+    ])
+    options = whisper.DecodingOptions(language="en", fp16=False, prompt=prompt)
+    texts = []
+    for audio, r in zip(audios, whisper.decode(model, mel, options)):
+        # Same checks (and defaults) as whisper's transcribe()
+        if r.no_speech_prob > 0.6 and r.avg_logprob < -1.0:
+            texts.append("")
+        elif r.compression_ratio > 2.4 or r.avg_logprob < -1.0:
+            # Needs transcribe()'s temperature fallback
+            texts.append(transcribe(audio, sample_rate, prompt))
+        else:
+            texts.append(r.text.strip())
+    return texts
+
+def record_and_transcribe(sample_rate=16000):
+    """Record audio, transcribing completed windows while the user speaks."""
+    windows = queue.Queue()
+    parts = []
+    errors = []
+
+    def worker():
+        try:
+            transcribe_windows()
+        except Exception as e:
+            errors.append(e)
+
+    def transcribe_windows():
+        done = False
+        while not done:
+            # Coalesce windows that piled up while the last batch ran
+            batch = [windows.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(windows.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                done = True
+            if batch:
+                prompt = parts[-1] if parts else None
+                texts = transcribe_batch(batch, sample_rate, prompt)
+                parts.extend(t for t in texts if t)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    audio = record_audio(sample_rate, windows)
+
+    print("🔄 Transcribing...")
+    thread.join()
+    if errors:
+        raise errors[0]
+    if audio is None:
+        return None
+    return " ".join(parts)
 
 def clean_for_speech(text):
     """Clean text for text-to-speech."""
-    text = re.sub(r'```[\s\S]*?```', ' code block omitted ', text)
-    text = re.sub(r'[#*`_\[\]]', '', text)
-    text = re.sub(r'https?://\S+', ' link ', text)
-    text = re.sub(r'\n+', '. ', text)
+    text = _CODE_RE.sub(' code block omitted ', text)
+    text = _MD_RE.sub('', text)
+    text = _URL_RE.sub(' link ', text)
+    text = _NL_RE.sub('. ', text)
     return text.strip()
 
 def split_into_chunks(text, max_sentences=2):
-    """Split text into digestible chunks."""
-    # Split by sentence endings
-    sentences = re.split(r'(?<=[.!?])\s+', text)
-    chunks = []
-    current = []
-
-    for s in sentences:
-        current.append(s)
-        if len(current) >= max_sentences:
-            chunks.append(' '.join(current))
-            current = []
-
-    if current:
-        chunks.append(' '.join(current))
-
-    return chunks
-
-def speak(text, rate=180):
-    """Speak text using macOS say."""
-    subprocess.run(["say", "-r", str(rate), text])
+    """Yield digestible chunks of up to max_sentences sentences each."""
+    start = 0
+    count = 0
+
+    for m in _SENTENCE_END_RE.finditer(text):
+        count += 1
+        if count >= max_sentences:
+            chunk = text[start:m.end()].strip()
+            if chunk:
+                yield chunk
+            start = m.end()
+            count = 0
+
+    tail = text[start:].strip()
+    if tail:
+        yield tail
+
+class SynthesizerSpeech:
+    """Handle for an utterance on the shared synthesizer (Popen-like)."""
+
+    def __init__(self, synth):
+        self.synth = synth
+
+    def wait(self):
+        while self.synth.isSpeaking():
+            time.sleep(0.05)
+
+    def terminate(self):
+        self.synth.stopSpeaking()
+
+def speak(text, rate=180, wait=True):
+    """Speak text aloud. Returns a handle with wait() and terminate().
+
+    Uses one long-lived NSSpeechSynthesizer when PyObjC is installed;
+    otherwise falls back to spawning a `say` process per call.
+    """
+    global SYNTHESIZER
+    if NSSpeechSynthesizer is not None:
+        # One synthesizer for the whole session: no fork/exec per chunk
+        if SYNTHESIZER is None:
+            SYNTHESIZER = NSSpeechSynthesizer.alloc().initWithVoice_(None)
+        SYNTHESIZER.setRate_(rate)
+        SYNTHESIZER.startSpeakingString_(text)
+        proc = SynthesizerSpeech(SYNTHESIZER)
+    else:
+        proc = subprocess.Popen(["say", "-r", str(rate)],
+                                stdin=subprocess.PIPE, text=True)
+        proc.stdin.write(text)
+        proc.stdin.close()
+    if wait:
+        proc.wait()
+    return proc
 
 def speak_interactive(text, rate=180):
     """Speak text in chunks, pausing for user to continue."""
-    chunks = split_into_chunks(text)
+    chunks = list(split_into_chunks(text))
     total = len(chunks)
+    proc = None
 
     for i, chunk in enumerate(chunks):
-        # Speak this chunk
-        speak(chunk, rate)
+        # Speak this chunk in the background while the prompt is shown
+        if proc:
+            proc.wait()
+        proc = speak(chunk, rate, wait=False)
 
         # If more chunks remain, ask to continue
         if i < total - 1:
             try:
                 response = input(f"\n[{i+1}/{total}] ENTER=continue, s=skip, r=repeat: ").strip().lower()
                 if response == 's':
+                    proc.terminate()
                     speak("Skipping rest.")
+                    proc = None
                     break
                 elif response == 'r':
-                    speak(chunk, rate)
+                    proc.wait()
+                    proc = speak(chunk, rate, wait=False)
                     # Re-prompt
                     input(f"[{i+1}/{total}] ENTER=continue: ")
             except KeyboardInterrupt:
+                proc.terminate()
                 speak("Stopped.")
+                proc = None
                 break
 
+    if proc:
+        proc.wait()
     print("✅ Done reading.")
 
+def resolve_auggie():
+    """Use the installed auggie binary directly to skip npx startup."""
+    global AUGGIE_CMD
+    auggie_bin = shutil.which("auggie")
+    if auggie_bin:
+        AUGGIE_CMD = [auggie_bin]
+    return AUGGIE_CMD
+
 def call_auggie(instruction, workspace, continue_session=False, session_id=None):
     """Call auggie CLI and get response."""
     print(f"\n🤖 Sending to Auggie...")
 
-    cmd = [
-        "npx", "@augmentcode/auggie",
+    cmd = AUGGIE_CMD + [
         "-i", instruction,
         "-w", workspace,
         "--print",
@@ -155,15 +410,33 @@ def call_auggie(instruction, workspace, continue_session=False, session_id=None)
     result = subprocess.run(cmd, capture_output=True, text=True, cwd=workspace)
     return result.stdout.strip() if result.returncode == 0 else f"Error: {result.stderr}"
 
-def get_latest_session_id():
-    """Get the most recent auggie session ID."""
+def _latest_session_from_disk():
+    """Newest session ID from auggie's session directory (no Node startup)."""
+    newest = None
+    newest_mtime = None
+    try:
+        with os.scandir(AUGGIE_SESSIONS_DIR) as it:
+            for e in it:
+                stem, ext = os.path.splitext(e.name)
+                if ext != ".json" or not stem or stem.startswith('.'):
+                    continue
+                if not e.is_file():
+                    continue
+                mtime = e.stat().st_mtime
+                if newest_mtime is None or mtime > newest_mtime:
+                    newest, newest_mtime = stem, mtime
+    except OSError:
+        return None
+    return newest
+
+def _latest_session_from_cli():
+    """Newest session ID via `auggie session list --json`."""
     try:
         result = subprocess.run(
-            ["npx", "@augmentcode/auggie", "session", "list", "--json"],
+            AUGGIE_CMD + ["session", "list", "--json"],
             capture_output=True, text=True
         )
         if result.returncode == 0 and result.stdout.strip():
-            import json
             sessions = json.loads(result.stdout)
             if sessions and len(sessions) > 0:
                 return sessions[0].get("id")
@@ -171,15 +444,18 @@ def get_latest_session_id():
         pass
     return None
 
+def get_latest_session_id(refresh=False):
+    """Get the most recent auggie session ID (cached until refresh)."""
+    global SESSION_ID
+    if SESSION_ID is None or refresh:
+        SESSION_ID = _latest_session_from_disk() or _latest_session_from_cli()
+    return SESSION_ID
+
 def main():
     print("=" * 50)
     print("🎙️  AUGGIE VOICE ASSISTANT")
     print("=" * 50)
 
-    if not check_dependencies():
-        print("Restart after install.")
-        return
-
     # Parse args
     workspace = os.getcwd()
     continue_session = False
@@ -202,6 +478,7 @@ def main():
 
     # Pre-load whisper
     load_whisper()
+    resolve_auggie()
 
     # Track session
     session_id = None
@@ -212,6 +489,9 @@ def main():
 
     speak("Voice assistant ready.")
 
+    # Warm up whisper while the user picks their first command
+    warm_whisper()
+
     while True:
         prompt = "\n[ENTER=voice, t=text, s=session, q=quit]: "
         cmd = input(prompt).strip()
@@ -252,15 +532,17 @@ def main():
                     continue
         else:
             # Voice input mode
-            audio = record_audio()
-            if audio is None or len(audio) == 0:
+            # Record and transcribe (windows overlap with recording)
+            try:
+                text = record_and_transcribe()
+            except Exception as e:
+                print(f"❌ Transcription failed: {e}")
+                speak("Transcription failed.")
+                continue
+            if text is None:
                 speak("No audio recorded.")
                 continue
 
-            # Transcribe
-            print("🔄 Transcribing...")
-            text = transcribe(audio)
-
         if not text:
             speak("Could not understand.")
             continue
@@ -280,7 +562,7 @@ def main():
         # After first call, always continue same session
         continue_session = True
         if not session_id:
-            session_id = get_latest_session_id()
+            session_id = get_latest_session_id(refresh=True)
 
 if __name__ == "__main__":
     main()